@@ -2,11 +2,14 @@ import os
 import json
 import logging
 import time
-from typing import Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 import requests
 from telegram import Bot, Update
 from translation_service import TranslationService
 from config import Config
+from diagnostics import UpdateTracer
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +20,21 @@ class TranslationBot:
             raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
 
         self.bot = Bot(token=self.bot_token)
-        self.translation_service = TranslationService()
         self.config = Config()
+        self.tracer = UpdateTracer(self.config.TRACE_SAMPLE_RATE, self.config.TRACE_BUFFER_SIZE)
+        self.translation_service = TranslationService(tracer=self.tracer)
 
         # Rate limiting storage (in production, use Redis)
         self.rate_limits = {}
         self.last_bot_messages = {}  # Store last bot message IDs for cleanup
 
+        # Inline mode state: latest query id and pending debounce timer per user,
+        # and translated results
+        self.inline_lock = threading.Lock()
+        self.latest_inline_queries = {}
+        self.pending_inline_timers = {}
+        self.inline_cache = OrderedDict()
+
         logger.info("Translation bot initialized successfully")
 
     def set_webhook(self, webhook_url: str):
@@ -44,10 +55,16 @@ class TranslationBot:
     def handle_webhook_update(self, update_data: dict):
         """Handle incoming webhook updates"""
         try:
-            # Create Update object from data for v20+ compatibility
-            update = Update.de_json(update_data, self.bot)
-            if update.message:
-                self.handle_message_sync(update.message)
+            with self.tracer.trace_update(update_data.get('update_id')):
+                # Create Update object from data for v20+ compatibility
+                with self.tracer.stage('parse_update'):
+                    update = Update.de_json(update_data, self.bot)
+                if update.message:
+                    self.tracer.annotate(chat_id=update.message.chat.id)
+                    self.handle_message_sync(update.message)
+                elif update.inline_query:
+                    self.tracer.annotate(command='inline')
+                    self.handle_inline_query_sync(update.inline_query)
         except Exception as e:
             logger.error(f"Error processing update: {e}")
 
@@ -64,6 +81,7 @@ class TranslationBot:
 
             command = text.split()[0].lower()
             language_code = self.config.get_language_code(command)
+            self.tracer.annotate(command=command)
 
             if not language_code:
                 # Handle help command or unknown command
@@ -124,6 +142,8 @@ class TranslationBot:
                     )
                     return
 
+                self.tracer.annotate(bytes_translated=len(original_text.encode('utf-8')))
+
                 # Get language name for display
                 language_name = self.config.get_language_name(command)
 
@@ -157,6 +177,177 @@ class TranslationBot:
 
 
 
+    def handle_inline_query_sync(self, inline_query):
+        """Handle inline queries like `@bot hi <text>` with per-user debouncing"""
+        try:
+            # Every new query supersedes the user's older ones, even if it is
+            # invalid or cached
+            user_id = inline_query.from_user.id
+            self.register_inline_query(user_id, inline_query.id)
+
+            parsed = self.parse_inline_query(inline_query.query)
+            if not parsed:
+                self.finish_inline_query(user_id, inline_query.id)
+                return
+
+            command, language_code, text = parsed
+            self.tracer.annotate(command=f"inline {command}")
+
+            if len(text) > self.config.MAX_MESSAGE_LENGTH:
+                self.finish_inline_query(user_id, inline_query.id)
+                return
+
+            # Results for text that was already translated are answered immediately
+            translated_text = self.get_cached_inline_translation(language_code, text)
+            if translated_text is not None:
+                self.finish_inline_query(user_id, inline_query.id)
+                self.answer_inline_query(inline_query.id, command, language_code, text, translated_text)
+                return
+
+            # Telegram sends a query on nearly every keystroke; translate only once
+            # the user pauses. The timer runs off the webhook request thread and is
+            # cancelled by the next query from the same user.
+            timer = threading.Timer(
+                self.config.INLINE_DEBOUNCE_SECONDS,
+                self.process_inline_query,
+                args=(user_id, inline_query.id, command, language_code, text)
+            )
+            timer.daemon = True
+            with self.inline_lock:
+                if self.latest_inline_queries.get(user_id) != inline_query.id:
+                    return
+                # The trace span stays open until the timer has answered the query
+                timer.kwargs['span'] = self.tracer.detach()
+                self.pending_inline_timers[user_id] = timer
+                timer.start()
+
+        except Exception as e:
+            logger.error(f"Error handling inline query: {e}")
+
+    def process_inline_query(self, user_id: int, inline_query_id: str, command: str,
+                             language_code: str, text: str, span: Optional[Dict] = None):
+        """Translate and answer a debounced inline query unless it was superseded"""
+        try:
+            with self.tracer.resume(span):
+                self._process_inline_query(user_id, inline_query_id, command, language_code, text)
+        except Exception as e:
+            logger.error(f"Error processing inline query: {e}")
+        finally:
+            self.finish_inline_query(user_id, inline_query_id)
+
+    def _process_inline_query(self, user_id: int, inline_query_id: str, command: str,
+                              language_code: str, text: str):
+        """Translate and answer an inline query on the current trace span"""
+        if self.is_inline_query_superseded(user_id, inline_query_id):
+            logger.debug(f"Dropped superseded inline query {inline_query_id} for user {user_id}")
+            return
+
+        # Another query for the same text may have finished while we waited
+        translated_text = self.get_cached_inline_translation(language_code, text)
+        if translated_text is None:
+            translated_text = self.translation_service.translate(text, language_code)
+            if not translated_text:
+                return
+            self.tracer.annotate(bytes_translated=len(text.encode('utf-8')))
+            self.cache_inline_translation(language_code, text, translated_text)
+
+        if self.is_inline_query_superseded(user_id, inline_query_id):
+            return
+
+        self.answer_inline_query(inline_query_id, command, language_code, text, translated_text)
+
+    def answer_inline_query(self, inline_query_id: str, command: str, language_code: str,
+                            text: str, translated_text: str) -> bool:
+        """Send an inline query answer through the Bot API"""
+        language_name = self.config.get_language_name(command)
+        result = {
+            'type': 'article',
+            'id': f"{language_code}_{abs(hash(text))}",
+            'title': f"Translation to {language_name}",
+            'description': translated_text[:100],
+            'input_message_content': {'message_text': translated_text}
+        }
+
+        try:
+            with self.tracer.stage('answer_inline_query'):
+                response = requests.post(
+                    f"https://api.telegram.org/bot{self.bot_token}/answerInlineQuery",
+                    json={
+                        'inline_query_id': inline_query_id,
+                        'results': [result],
+                        'cache_time': 300
+                    },
+                    timeout=10
+                )
+            if not response.ok:
+                logger.error(f"Failed to answer inline query {inline_query_id}: {response.text}")
+                return False
+
+            logger.info(f"Inline translation completed: {command} for query {inline_query_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error answering inline query {inline_query_id}: {e}")
+            return False
+
+    def parse_inline_query(self, query: str) -> Optional[Tuple[str, str, str]]:
+        """Split an inline query into command, language code and text to translate"""
+        if not query:
+            return None
+
+        parts = query.strip().split(maxsplit=1)
+        if len(parts) < 2:
+            return None
+
+        command = '/' + parts[0].lstrip('/').lower()
+        language_code = self.config.get_language_code(command)
+        if not language_code:
+            return None
+
+        # Collapse whitespace so trailing spaces while typing reuse cached results
+        text = ' '.join(parts[1].split())
+        if not text:
+            return None
+
+        return command, language_code, text
+
+    def register_inline_query(self, user_id: int, inline_query_id: str):
+        """Mark a query as the user's latest and cancel any pending older query"""
+        with self.inline_lock:
+            self.latest_inline_queries[user_id] = inline_query_id
+            timer = self.pending_inline_timers.pop(user_id, None)
+        if timer:
+            timer.cancel()
+            self.tracer.finish(timer.kwargs.get('span'))
+
+    def finish_inline_query(self, user_id: int, inline_query_id: str):
+        """Forget a query's state if it is still the user's latest"""
+        with self.inline_lock:
+            if self.latest_inline_queries.get(user_id) == inline_query_id:
+                del self.latest_inline_queries[user_id]
+                self.pending_inline_timers.pop(user_id, None)
+
+    def is_inline_query_superseded(self, user_id: int, inline_query_id: str) -> bool:
+        """Check if a newer inline query has arrived from the same user"""
+        with self.inline_lock:
+            return self.latest_inline_queries.get(user_id) != inline_query_id
+
+    def get_cached_inline_translation(self, language_code: str, text: str) -> Optional[str]:
+        """Return a previously translated inline result, if any"""
+        key = (language_code, text)
+        with self.inline_lock:
+            if key in self.inline_cache:
+                self.inline_cache.move_to_end(key)
+                return self.inline_cache[key]
+        return None
+
+    def cache_inline_translation(self, language_code: str, text: str, translated_text: str):
+        """Store an inline translation, evicting the least recently used entries"""
+        with self.inline_lock:
+            self.inline_cache[(language_code, text)] = translated_text
+            self.inline_cache.move_to_end((language_code, text))
+            while len(self.inline_cache) > self.config.INLINE_CACHE_SIZE:
+                self.inline_cache.popitem(last=False)
+
     def is_rate_limited(self, user_id: int, chat_id: int) -> bool:
         """Check if user is rate limited"""
         key = f"{user_id}_{chat_id}"
@@ -180,7 +371,7 @@ class TranslationBot:
             except Exception as e:
                 logger.debug(f"Could not delete previous message: {e}")
             finally:
-                del self.last_bot_messages[key]
+                self.last_bot_messages.pop(key, None)
 
     def extract_text_content(self, message) -> Optional[str]:
         """Extract only text content from a message, ignoring media"""
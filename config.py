@@ -14,6 +14,15 @@ class Config:
         self.MAX_MESSAGE_LENGTH = int(os.getenv('MAX_MESSAGE_LENGTH', '5000'))
         self.RATE_LIMIT_SECONDS = int(os.getenv('RATE_LIMIT_SECONDS', '2'))
         self.WEBHOOK_PORT = int(os.getenv('PORT', '5000'))
+
+        # Inline mode settings
+        self.INLINE_DEBOUNCE_SECONDS = float(os.getenv('INLINE_DEBOUNCE_SECONDS', '0.6'))
+        self.INLINE_CACHE_SIZE = int(os.getenv('INLINE_CACHE_SIZE', '500'))
+
+        # Diagnostics settings
+        self.TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+        self.TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '1000'))
+        self.PROFILE_MAX_SECONDS = int(os.getenv('PROFILE_MAX_SECONDS', '30'))
         
         logger.info(f"Config loaded: {len(self.languages)} languages supported")
     
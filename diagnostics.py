@@ -0,0 +1,275 @@
+import os
+import sys
+import time
+import uuid
+import random
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Leaf frames of threads that are blocked waiting rather than doing work
+IDLE_FUNCTIONS = {
+    'threading.py:wait',
+    'threading.py:_wait_for_tstate_lock',
+    'selectors.py:select',
+    'socket.py:accept',
+    'socketserver.py:serve_forever',
+    'queue.py:get'
+}
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.01, ignored_threads: Optional[Set[str]] = None,
+                 max_results: int = 5):
+        self.interval = interval
+        self.ignored_threads = ignored_threads or set()
+        self.max_results = max_results
+        self.results = OrderedDict()
+        self._lock = threading.Lock()
+        self._running = False
+
+    def is_running(self) -> bool:
+        """Check if a profiling session is in progress"""
+        with self._lock:
+            return self._running
+
+    def start(self, seconds: float) -> str:
+        """
+        Start sampling the stacks of all threads in a background thread
+
+        Args:
+            seconds: How long to sample for
+
+        Returns:
+            Id that can be passed to get_result()
+        """
+        with self._lock:
+            if self._running:
+                raise RuntimeError("Profiler already running")
+            self._running = True
+            profile_id = uuid.uuid4().hex[:12]
+            self.results[profile_id] = None
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+
+        thread = threading.Thread(target=self._run, args=(profile_id, seconds),
+                                  name='sampling-profiler', daemon=True)
+        thread.start()
+        return profile_id
+
+    def get_result(self, profile_id: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Look up a profiling session
+
+        Returns:
+            Tuple of status ('unknown', 'running' or 'done') and the result
+        """
+        with self._lock:
+            if profile_id not in self.results:
+                return 'unknown', None
+            result = self.results[profile_id]
+        return ('running', None) if result is None else ('done', result)
+
+    def _run(self, profile_id: str, seconds: float):
+        """Sample stacks until the deadline and store the result"""
+        try:
+            stacks = Counter()
+            samples = 0
+            idle_samples = 0
+            own_thread = threading.get_ident()
+            deadline = time.monotonic() + seconds
+
+            logger.info(f"Sampling profiler {profile_id} started for {seconds}s")
+
+            while time.monotonic() < deadline:
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    thread_name = thread_names.get(thread_id, str(thread_id))
+                    if thread_id == own_thread or thread_name in self.ignored_threads:
+                        continue
+                    if self._frame_name(frame) in IDLE_FUNCTIONS:
+                        idle_samples += 1
+                        continue
+                    stacks[f"{thread_name};{self._collapse(frame)}"] += 1
+                samples += 1
+                time.sleep(self.interval)
+
+            logger.info(f"Sampling profiler {profile_id} finished: {samples} samples")
+
+            result = {
+                'profile_id': profile_id,
+                'duration_seconds': seconds,
+                'interval_seconds': self.interval,
+                'samples': samples,
+                'idle_samples_skipped': idle_samples,
+                'stacks': dict(stacks.most_common())
+            }
+        except Exception as e:
+            logger.error(f"Sampling profiler {profile_id} failed: {e}")
+            result = {'profile_id': profile_id, 'error': str(e), 'stacks': {}}
+
+        with self._lock:
+            if profile_id in self.results:
+                self.results[profile_id] = result
+            self._running = False
+
+    def _frame_name(self, frame) -> str:
+        """Name a frame as file:function"""
+        return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+    def _collapse(self, frame) -> str:
+        """Turn a frame into a root-first, semicolon separated stack"""
+        names = []
+        while frame is not None:
+            names.append(self._frame_name(frame))
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    @staticmethod
+    def to_collapsed(result: Dict) -> str:
+        """Format profiler output in the collapsed format used by flamegraph tools"""
+        return '\n'.join(f"{stack} {count}" for stack, count in result['stacks'].items())
+
+class UpdateTracer:
+    def __init__(self, sample_rate: float = 0.0, buffer_size: int = 1000):
+        self.sample_rate = self._clamp(sample_rate)
+        self.spans = deque(maxlen=buffer_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Start times of spans that are not finished yet, and which of them
+        # were handed off to another thread, keyed by id(span)
+        self._open_spans = {}
+        self._detached = set()
+
+    def set_sample_rate(self, sample_rate: float):
+        """Change the fraction of updates that are traced"""
+        self.sample_rate = self._clamp(sample_rate)
+        logger.info(f"Trace sample rate set to {self.sample_rate}")
+
+    @staticmethod
+    def _clamp(sample_rate: float) -> float:
+        """Keep a sample rate within [0, 1]"""
+        return max(0.0, min(1.0, sample_rate))
+
+    @contextmanager
+    def trace_update(self, update_id: Optional[int]):
+        """Trace a single update if it is picked by the sample rate"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            yield None
+            return
+
+        span = {
+            'update_id': update_id,
+            'started_at': time.time(),
+            'chat_id': None,
+            'command': None,
+            'bytes_translated': 0,
+            'stages': {},
+            'total_ms': None
+        }
+        with self._lock:
+            self._open_spans[id(span)] = time.perf_counter()
+        self._local.span = span
+        try:
+            yield span
+        finally:
+            self._local.span = None
+            with self._lock:
+                detached = id(span) in self._detached
+            if not detached:
+                self.finish(span)
+
+    def current_span(self) -> Optional[Dict]:
+        """Return the span of the update being traced on this thread, if any"""
+        return getattr(self._local, 'span', None)
+
+    def detach(self) -> Optional[Dict]:
+        """
+        Hand the current span off to another thread
+
+        The span is not finished when trace_update() exits; the thread that
+        picks it up with resume() or calls finish() completes it instead.
+
+        Returns:
+            The current span, or None if this update is not being traced
+        """
+        span = self.current_span()
+        if span is not None:
+            with self._lock:
+                self._detached.add(id(span))
+        return span
+
+    @contextmanager
+    def resume(self, span: Optional[Dict]):
+        """Continue a detached span on this thread and finish it afterwards"""
+        previous = self.current_span()
+        self._local.span = span
+        try:
+            yield span
+        finally:
+            self._local.span = previous
+            if span is not None:
+                self.finish(span)
+
+    def finish(self, span: Optional[Dict]):
+        """Record the span's total duration and add it to the ring buffer, once"""
+        if span is None:
+            return
+        with self._lock:
+            start = self._open_spans.pop(id(span), None)
+            self._detached.discard(id(span))
+        if start is None:
+            return
+        span['total_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        self.spans.append(span)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage of the current update, if it is being traced"""
+        span = getattr(self._local, 'span', None)
+        if span is None:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = round((time.perf_counter() - start) * 1000, 3)
+            span['stages'][name] = span['stages'].get(name, 0) + elapsed
+
+    def annotate(self, **fields):
+        """Attach fields such as chat_id or command to the current span"""
+        span = getattr(self._local, 'span', None)
+        if span is None:
+            return
+        if 'bytes_translated' in fields:
+            span['bytes_translated'] += fields.pop('bytes_translated')
+        span.update(fields)
+
+    def get_spans(self, limit: int = 100, command: Optional[str] = None,
+                  min_total_ms: float = 0) -> List[Dict]:
+        """
+        Return the most recent spans from the ring buffer
+
+        Args:
+            limit: Maximum number of spans to return
+            command: Only return spans for this command (e.g., '/hi')
+            min_total_ms: Only return spans that took at least this long
+
+        Returns:
+            List of spans, newest first
+        """
+        results = []
+        for span in reversed(list(self.spans)):
+            if command and span['command'] != command:
+                continue
+            if (span['total_ms'] or 0) < min_total_ms:
+                continue
+            results.append(dict(span, stages=dict(span['stages'])))
+            if len(results) >= limit:
+                break
+        return results
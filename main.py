@@ -1,13 +1,16 @@
 
 import os
+import hmac
 import logging
 import sys
+import math
 import asyncio
 import threading
 import time
 import requests
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from bot import TranslationBot
+from diagnostics import SamplingProfiler
 
 # Configure logging for production
 logging.basicConfig(
@@ -27,6 +30,7 @@ if missing_vars:
     sys.exit(1)
 
 app = Flask(__name__)
+profiler = SamplingProfiler(ignored_threads={'keep-alive'})
 
 def keep_alive_worker():
     """Internal keep-alive worker that pings the health endpoint every 10 minutes"""
@@ -151,6 +155,101 @@ def test_translation():
         logger.error(f"Error in test translation: {e}")
         return jsonify({'error': str(e)}), 500
 
+def diagnostics_authorized() -> bool:
+    """Check the diagnostics token; endpoints are disabled when DIAGNOSTICS_TOKEN is unset"""
+    token = os.getenv('DIAGNOSTICS_TOKEN')
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Diagnostics-Token', ''), token)
+
+@app.route('/diagnostics/profile', methods=['POST'])
+def diagnostics_profile():
+    """Start the sampling profiler for N seconds in the background"""
+    if not diagnostics_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        seconds = max(1.0, min(seconds, bot.config.PROFILE_MAX_SECONDS))
+
+        if profiler.is_running():
+            return jsonify({'error': 'Profiler already running'}), 409
+        profile_id = profiler.start(seconds)
+
+        return jsonify({
+            'status': 'running',
+            'profile_id': profile_id,
+            'seconds': seconds,
+            'result_url': f"/diagnostics/profile/{profile_id}"
+        }), 202
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError:
+        return jsonify({'error': 'seconds must be a number'}), 400
+    except Exception as e:
+        logger.error(f"Error starting profiler: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/diagnostics/profile/<profile_id>', methods=['GET'])
+def diagnostics_profile_result(profile_id):
+    """Return collapsed stacks (or JSON with ?format=json) for a profiling run"""
+    if not diagnostics_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    status, result = profiler.get_result(profile_id)
+    if status == 'unknown':
+        return jsonify({'error': 'Unknown profile id'}), 404
+    if status == 'running':
+        return jsonify({'status': 'running', 'profile_id': profile_id}), 202
+
+    if request.args.get('format', 'collapsed') == 'json':
+        return jsonify(result), 200
+    return Response(SamplingProfiler.to_collapsed(result), mimetype='text/plain'), 200
+
+@app.route('/diagnostics/tracing', methods=['GET', 'POST'])
+def diagnostics_tracing():
+    """Get or set the per-update trace sample rate"""
+    if not diagnostics_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            sample_rate = data.get('sample_rate')
+            if isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float)) \
+                    or math.isnan(sample_rate):
+                return jsonify({'error': 'sample_rate must be a number between 0 and 1'}), 400
+            bot.tracer.set_sample_rate(float(sample_rate))
+        return jsonify({
+            'sample_rate': bot.tracer.sample_rate,
+            'buffered_spans': len(bot.tracer.spans),
+            'buffer_size': bot.tracer.spans.maxlen
+        }), 200
+    except Exception as e:
+        logger.error(f"Error updating tracing settings: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/diagnostics/traces', methods=['GET'])
+def diagnostics_traces():
+    """Query recent per-update trace spans from the ring buffer"""
+    if not diagnostics_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    try:
+        limit = int(request.args.get('limit', 100))
+        min_total_ms = float(request.args.get('min_ms', 0))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer and min_ms a number'}), 400
+    if limit <= 0:
+        return jsonify({'error': 'limit must be positive'}), 400
+
+    try:
+        spans = bot.tracer.get_spans(
+            limit=limit,
+            command=request.args.get('command'),
+            min_total_ms=min_total_ms
+        )
+        return jsonify({'count': len(spans), 'spans': spans}), 200
+    except Exception as e:
+        logger.error(f"Error reading traces: {e}")
+        return jsonify({'error': str(e)}), 500
+
 def setup_webhook():
     """Set up webhook if running in development"""
     webhook_url = os.getenv('WEBHOOK_URL')
@@ -170,7 +269,7 @@ if __name__ == '__main__':
     
     # Start keep-alive thread (only if not using production server)
     if not os.getenv('GUNICORN_CMD_ARGS'):
-        keep_alive_thread = threading.Thread(target=keep_alive_worker, daemon=True)
+        keep_alive_thread = threading.Thread(target=keep_alive_worker, name='keep-alive', daemon=True)
         keep_alive_thread.start()
         logger.info("Keep-alive worker started")
     
@@ -0,0 +1,49 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import bot as bot_module
+from bot import TranslationBot
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StubTranslationService:
+    def __init__(self, result=None):
+        self.calls = []
+        self.result = result
+
+    def translate(self, text, target_language, source_language='auto'):
+        self.calls.append(text)
+        return self.result if self.result is not None else text.upper()
+
+
+@pytest.fixture
+def translation_bot(monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', '123456:TEST')
+    monkeypatch.setenv('INLINE_DEBOUNCE_SECONDS', '0.05')
+    monkeypatch.setenv('INLINE_CACHE_SIZE', '3')
+
+    answers = []
+
+    def fake_post(url, json=None, timeout=None):
+        answers.append(json)
+        return SimpleNamespace(ok=True, text='')
+
+    monkeypatch.setattr(bot_module.requests, 'post', fake_post)
+
+    translation_bot = TranslationBot()
+    translation_bot.translation_service = StubTranslationService()
+    translation_bot.answers = answers
+    return translation_bot
+
+
+def inline_query(query_id, query, user_id=1):
+    return SimpleNamespace(id=query_id, query=query, from_user=SimpleNamespace(id=user_id))
+
+
+def wait_for_pending(translation_bot):
+    for timer in list(translation_bot.pending_inline_timers.values()):
+        timer.join()
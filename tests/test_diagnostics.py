@@ -0,0 +1,110 @@
+import threading
+import time
+
+from conftest import StubTranslationService, inline_query, wait_for_pending
+from diagnostics import SamplingProfiler, UpdateTracer
+
+
+def test_tracer_clamps_sample_rate_from_config():
+    assert UpdateTracer(sample_rate=5).sample_rate == 1.0
+    assert UpdateTracer(sample_rate=-1).sample_rate == 0.0
+
+
+def test_resumed_span_collects_stages_from_another_thread():
+    tracer = UpdateTracer(sample_rate=1)
+
+    with tracer.trace_update(42):
+        span = tracer.detach()
+
+    # A detached span is only recorded once the other thread finishes it
+    assert tracer.get_spans() == []
+
+    def worker():
+        with tracer.resume(span):
+            with tracer.stage('translate_api'):
+                pass
+            tracer.annotate(bytes_translated=5)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    [traced] = tracer.get_spans()
+    assert traced['update_id'] == 42
+    assert 'translate_api' in traced['stages']
+    assert traced['bytes_translated'] == 5
+    assert tracer.current_span() is None
+
+
+def test_profiler_runs_in_background_and_skips_idle_threads():
+    profiler = SamplingProfiler(interval=0.005)
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            sum(range(1000))
+
+    def idle():
+        stop.wait()
+
+    threads = [threading.Thread(target=busy, name='busy'), threading.Thread(target=idle, name='idle')]
+    for thread in threads:
+        thread.start()
+
+    profile_id = profiler.start(0.2)
+    assert profiler.is_running()
+    assert profiler.get_result(profile_id)[0] == 'running'
+
+    while profiler.is_running():
+        time.sleep(0.01)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    status, result = profiler.get_result(profile_id)
+    assert status == 'done'
+    assert any(stack.startswith('busy;') for stack in result['stacks'])
+    assert not any(stack.startswith('idle;') for stack in result['stacks'])
+    assert profiler.get_result('missing') == ('unknown', None)
+
+
+def test_failed_translation_is_not_counted_as_bytes_translated(translation_bot):
+    translation_bot.translation_service = StubTranslationService(result='')
+    translation_bot.tracer.set_sample_rate(1)
+
+    with translation_bot.tracer.trace_update(1):
+        translation_bot.handle_inline_query_sync(inline_query('1', 'hi hello'))
+    wait_for_pending(translation_bot)
+
+    [span] = translation_bot.tracer.get_spans()
+    assert span['bytes_translated'] == 0
+
+
+def test_translated_bytes_are_recorded_on_the_update_span(translation_bot):
+    translation_bot.tracer.set_sample_rate(1)
+
+    with translation_bot.tracer.trace_update(1):
+        translation_bot.handle_inline_query_sync(inline_query('1', 'hi hello'))
+    wait_for_pending(translation_bot)
+
+    [span] = translation_bot.tracer.get_spans()
+    assert span['command'] == 'inline /hi'
+    assert span['bytes_translated'] == 5
+    assert 'answer_inline_query' in span['stages']
+    # The span covers the debounce and the answer, not just the webhook request
+    assert span['total_ms'] >= sum(span['stages'].values())
+    assert span['total_ms'] >= translation_bot.config.INLINE_DEBOUNCE_SECONDS * 1000
+
+
+def test_superseded_inline_span_is_still_recorded(translation_bot):
+    translation_bot.tracer.set_sample_rate(1)
+
+    with translation_bot.tracer.trace_update(1):
+        translation_bot.handle_inline_query_sync(inline_query('1', 'hi hel'))
+    with translation_bot.tracer.trace_update(2):
+        translation_bot.handle_inline_query_sync(inline_query('2', 'hi hello'))
+    wait_for_pending(translation_bot)
+
+    spans = translation_bot.tracer.get_spans()
+    assert sorted(span['update_id'] for span in spans) == [1, 2]
+    assert all(span['total_ms'] is not None for span in spans)
@@ -0,0 +1,82 @@
+from conftest import StubTranslationService, inline_query, wait_for_pending
+
+def answered_ids(translation_bot):
+    return [answer['inline_query_id'] for answer in translation_bot.answers]
+
+
+def test_parse_inline_query_normalises_whitespace(translation_bot):
+    assert translation_bot.parse_inline_query('  HI   hello \t world  ') == ('/hi', 'hi', 'hello world')
+
+
+def test_parse_inline_query_rejects_unknown_language(translation_bot):
+    assert translation_bot.parse_inline_query('xx hello') is None
+    assert translation_bot.parse_inline_query('hi') is None
+    assert translation_bot.parse_inline_query('') is None
+
+
+def test_sequential_keystrokes_translate_once(translation_bot):
+    for query_id, query in [('1', 'hi a'), ('2', 'hi ab'), ('3', 'hi abc')]:
+        translation_bot.handle_inline_query_sync(inline_query(query_id, query))
+    wait_for_pending(translation_bot)
+
+    assert translation_bot.translation_service.calls == ['abc']
+    assert answered_ids(translation_bot) == ['3']
+    assert translation_bot.answers[0]['results'][0]['input_message_content'] == {'message_text': 'ABC'}
+    assert translation_bot.latest_inline_queries == {}
+
+
+def test_superseded_query_is_dropped_before_translation(translation_bot):
+    translation_bot.register_inline_query(1, '2')
+    translation_bot.process_inline_query(1, '1', '/hi', 'hi', 'hell')
+
+    assert translation_bot.translation_service.calls == []
+    assert translation_bot.answers == []
+
+
+def test_cache_hit_supersedes_pending_query(translation_bot):
+    translation_bot.cache_inline_translation('hi', 'hel', 'HEL')
+
+    translation_bot.handle_inline_query_sync(inline_query('1', 'hi hell'))
+    translation_bot.handle_inline_query_sync(inline_query('2', 'hi hel'))
+    wait_for_pending(translation_bot)
+
+    assert translation_bot.translation_service.calls == []
+    assert answered_ids(translation_bot) == ['2']
+    assert translation_bot.latest_inline_queries == {}
+
+
+def test_invalid_query_supersedes_pending_query(translation_bot):
+    translation_bot.handle_inline_query_sync(inline_query('1', 'hi hello'))
+    translation_bot.handle_inline_query_sync(inline_query('2', 'hi'))
+    translation_bot.handle_inline_query_sync(inline_query('3', 'zz hello'))
+    wait_for_pending(translation_bot)
+
+    assert translation_bot.translation_service.calls == []
+    assert translation_bot.answers == []
+    assert translation_bot.latest_inline_queries == {}
+    assert translation_bot.pending_inline_timers == {}
+
+
+def test_failed_translation_clears_query_state(translation_bot):
+    translation_bot.translation_service = StubTranslationService(result='')
+
+    translation_bot.handle_inline_query_sync(inline_query('1', 'hi hello'))
+    wait_for_pending(translation_bot)
+
+    assert translation_bot.answers == []
+    assert translation_bot.latest_inline_queries == {}
+    assert translation_bot.pending_inline_timers == {}
+
+
+def test_inline_cache_evicts_least_recently_used(translation_bot):
+    for text in ['a', 'b', 'c']:
+        translation_bot.cache_inline_translation('hi', text, text.upper())
+
+    # Touch 'a' so 'b' becomes the least recently used entry
+    assert translation_bot.get_cached_inline_translation('hi', 'a') == 'A'
+    translation_bot.cache_inline_translation('hi', 'd', 'D')
+
+    assert len(translation_bot.inline_cache) == 3
+    assert translation_bot.get_cached_inline_translation('hi', 'b') is None
+    assert translation_bot.get_cached_inline_translation('hi', 'a') == 'A'
+
@@ -3,26 +3,36 @@ import logging
 from typing import Optional
 from deep_translator import GoogleTranslator
 import time
+import threading
+from contextlib import nullcontext
 
 logger = logging.getLogger(__name__)
 
 class TranslationService:
-    def __init__(self):
+    def __init__(self, tracer=None):
         self.last_request_time = 0
         self.min_request_interval = 0.1  # Minimum 100ms between requests
+        self._rate_limit_lock = threading.Lock()
+        self.tracer = tracer  # Optional UpdateTracer for per-update stage timings
         
         logger.info("Translation service initialized with deep-translator")
     
+    def _stage(self, name: str):
+        """Time a stage on the current trace span, if tracing is enabled"""
+        return self.tracer.stage(name) if self.tracer else nullcontext()
+
     def _rate_limit(self):
         """Simple rate limiting for Google Translate API"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        # Inline debounce timers translate from their own threads
+        with self._rate_limit_lock:
+            current_time = time.time()
+            time_since_last = current_time - self.last_request_time
+            
+            if time_since_last < self.min_request_interval:
+                sleep_time = self.min_request_interval - time_since_last
+                time.sleep(sleep_time)
+            
+            self.last_request_time = time.time()
     
     def translate(self, text: str, target_language: str, source_language: str = 'auto') -> Optional[str]:
         """
@@ -41,13 +51,15 @@ class TranslationService:
         
         try:
             # Apply rate limiting
-            self._rate_limit()
+            with self._stage('rate_limit_wait'):
+                self._rate_limit()
             
             # Create translator instance with deep-translator
             translator = GoogleTranslator(source=source_language, target=target_language)
             
             # Perform translation
-            translated_text = translator.translate(text.strip())
+            with self._stage('translate_api'):
+                translated_text = translator.translate(text.strip())
             
             if translated_text and translated_text.strip():
                 # Log successful translation